@@ -1,72 +1,121 @@
 import streamlit as st
-from deep_translator import GoogleTranslator
 import os
-import glob
-
-def translate_to_gujarati(word):
-    try:
-        translator = GoogleTranslator(source='en', target='gu')
-        translation = translator.translate(word)
-        return translation
-    except Exception as e:
-        st.error(f"Translation error: {str(e)}")
-        return None
-
-def get_all_text_files():
-    try:
-        text_files = glob.glob("data/*.txt")
-        return text_files
-    except Exception as e:
-        st.error(f"Error reading directory: {str(e)}")
-        return []
+import numpy as np
+from news_loader import (
+    translate_to_gujarati,
+    get_all_text_files,
+    get_data_signature,
+    load_all_articles,
+    store_results,
+    get_stored_results,
+    get_results_page,
+    show_results_pager
+)
+
+# Separates articles in the flat corpus; it never occurs in typed search text
+ARTICLE_SEPARATOR = '\x00'
+
+def build_search_corpus(articles_data):
+    # Casefold the corpus once and lay it out as one flat string plus start offsets,
+    # so a scan runs inside str.find instead of iterating article objects in Python.
+    # offsets has one extra entry, so article i spans offsets[i]:offsets[i + 1] - 1
+    corpus = ARTICLE_SEPARATOR.join(article['content'].casefold() for article in articles_data)
+    offsets = [0]
+    for article in articles_data:
+        offsets.append(offsets[-1] + len(article['content'].casefold()) + 1)
+    return corpus, offsets
+
+def build_suffix_array(text):
+    # Prefix doubling: after round k suffixes are sorted by their first 2k characters
+    codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+    n = len(codes)
+    if n == 0:
+        return np.empty(0, dtype=np.int32)
+
+    rank = np.unique(codes, return_inverse=True)[1].astype(np.int64)
+    suffix_array = np.argsort(rank, kind='stable')
+    k = 1
+    while rank[suffix_array[-1]] < n - 1:
+        second = np.full(n, -1, dtype=np.int64)
+        second[:n - k] = rank[k:]
+        suffix_array = np.lexsort((second, rank))
+        first_sorted, second_sorted = rank[suffix_array], second[suffix_array]
+        changed = (first_sorted[1:] != first_sorted[:-1]) | (second_sorted[1:] != second_sorted[:-1])
+        rank = np.empty(n, dtype=np.int64)
+        rank[suffix_array] = np.concatenate(([0], np.cumsum(changed)))
+        k *= 2
+    # Positions fit in int32 for any corpus under 2 GiB characters, halving the stored index
+    return suffix_array.astype(np.int32)
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def build_index(signature):
+    # cache_resource hands back the same objects on every hit, so queries never copy
+    # the corpus; everything search_in_files needs comes from this one entry. Only the
+    # current signature is kept, so a data update frees the previous index
+    articles_data = load_all_articles(signature)
+    corpus, offsets = build_search_corpus(articles_data)
+    return articles_data, corpus, build_suffix_array(corpus), np.asarray(offsets, dtype=np.int64)
+
+def find_occurrences(corpus, suffix_array, needle):
+    # Suffixes starting with needle form one contiguous range of the suffix array;
+    # two binary searches find it in O(len(needle) * log(len(corpus)))
+    m = len(needle)
+    lo, hi = 0, len(suffix_array)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if corpus[suffix_array[mid]:suffix_array[mid] + m] < needle:
+            lo = mid + 1
+        else:
+            hi = mid
+    start, hi = lo, len(suffix_array)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if corpus[suffix_array[mid]:suffix_array[mid] + m] <= needle:
+            lo = mid + 1
+        else:
+            hi = mid
+    return suffix_array[start:lo]
 
 def search_in_files(search_word):
-    all_results = []
     text_files = get_all_text_files()
 
     if not text_files:
         st.warning("No text files found in the data directory")
         return []
 
-    for file_path in text_files:
-        try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-                articles = content.split('//')
-
-                for article in articles:
-                    if search_word.lower() in article.lower():
-                        file_name = os.path.basename(file_path)
-                        all_results.append({
-                            'file': file_name,
-                            'content': article
-                        })
+    articles_data, corpus, suffix_array, offsets = build_index(get_data_signature(text_files))
 
-        except Exception as e:
-            st.error(f"Error reading {file_path}: {str(e)}")
-            continue
+    needle = search_word.casefold()
+    if ARTICLE_SEPARATOR in needle:
+        return []
 
-    return all_results
+    positions = find_occurrences(corpus, suffix_array, needle)
+    article_ids = np.unique(np.searchsorted(offsets, positions, side='right') - 1)
+    return [articles_data[i] for i in article_ids]
 
 def display_results(results):
     if results:
         st.subheader(f"Found {len(results)} News Articles:")
 
+        page = get_results_page(results)
+
         # Group results by file
         files_dict = {}
-        for result in results:
+        for result in page:
             if result['file'] not in files_dict:
                 files_dict[result['file']] = []
             files_dict[result['file']].append(result['content'])
 
         # Display results grouped by file
         for file_name, articles in files_dict.items():
-            with st.expander(f"📄 {file_name} ({len(articles)} articles)"):
+            with st.expander(f"📄 {file_name} ({len(articles)} shown)"):
                 for idx, article in enumerate(articles, 1):
                     st.markdown(f"**Article {idx}:**")
                     st.write(article)
                     if idx < len(articles):
                         st.markdown("---")
+
+        show_results_pager(page, results)
     else:
         st.warning("No articles found containing this word.")
 
@@ -103,8 +152,11 @@ def main():
 
                 if st.button("Search", key="english_search"):
                     with st.spinner("Searching in all files..."):
-                        results = search_in_files(gujarati_word)
-                        display_results(results)
+                        store_results(gujarati_word, search_in_files(gujarati_word))
+
+                results = get_stored_results(gujarati_word)
+                if results is not None:
+                    display_results(results)
 
     else:  # Direct Gujarati Input
         # Add a helper message for typing in Gujarati
@@ -120,8 +172,11 @@ def main():
         if gujarati_word:
             if st.button("Search", key="gujarati_search"):
                 with st.spinner("Searching in all files..."):
-                    results = search_in_files(gujarati_word)
-                    display_results(results)
+                    store_results(gujarati_word, search_in_files(gujarati_word))
+
+            results = get_stored_results(gujarati_word)
+            if results is not None:
+                display_results(results)
 
     # Add footer with instructions
     st.markdown("---")
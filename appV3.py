@@ -1,103 +1,123 @@
 import streamlit as st
-from deep_translator import GoogleTranslator
 import os
-import glob
 from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+from news_loader import (
+    DATA_DIR,
+    translate_to_gujarati,
+    get_all_text_files,
+    get_data_signature,
+    load_all_articles,
+    store_results,
+    get_stored_results,
+    get_results_page,
+    show_results_pager
+)
+import json
 import numpy as np
-import pickle
 import torch
+import torch.nn.functional as F
 
 # Check if CUDA is available
 device = 'cuda' if torch.cuda.is_available() else 'cpu'
 
+# Half precision halves the matmul bandwidth on GPU; CPU kernels are faster in float32
+compute_dtype = torch.float16 if device == 'cuda' else torch.float32
+
 @st.cache_resource
 def load_model():
     # Using multilingual model to handle both English and Gujarati
-    return SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2').to(device)
-
-def translate_to_gujarati(word):
-    try:
-        translator = GoogleTranslator(source='en', target='gu')
-        translation = translator.translate(word)
-        return translation
-    except Exception as e:
-        st.error(f"Translation error: {str(e)}")
-        return None
-
-def get_all_text_files():
-    try:
-        text_files = glob.glob("data/*.txt")
-        return text_files
-    except Exception as e:
-        st.error(f"Error reading directory: {str(e)}")
-        return []
-
-def create_embeddings(model, articles_data):
-    embeddings = []
-    for article in articles_data:
-        embedding = model.encode(article['content'], convert_to_tensor=True)
-        embeddings.append(embedding)
-    return torch.stack(embeddings)
-
-def load_or_create_embeddings(model):
-    cache_file = "data/embeddings_cache.pkl"
+    model = SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2').to(device)
+    if device == 'cuda':
+        # Run the encoder on tensor cores; embeddings are stored in float16 anyway
+        model = model.half()
+    return model
+
+def create_embeddings(model, contents):
+    # Encode all articles in batches rather than one forward pass per article
+    return model.encode(
+        contents,
+        batch_size=64,
+        convert_to_tensor=True,
+        normalize_embeddings=True,
+        show_progress_bar=False,
+        device=device
+    )
 
-    if os.path.exists(cache_file):
-        with open(cache_file, 'rb') as f:
-            cached_data = pickle.load(f)
-            return cached_data['embeddings'], cached_data['articles_data']
+def to_columns(articles_data):
+    # Store each file name once and refer to it by id from a compact int32 array
+    files, file_ids = np.unique([article['file'] for article in articles_data], return_inverse=True)
+    return {
+        'files': files.tolist(),
+        'file_ids': file_ids.astype(np.int32),
+        'contents': [article['content'] for article in articles_data]
+    }
+
+EMBEDDINGS_FILE = os.path.join(DATA_DIR, "embeddings.npy")
+ARTICLES_FILE = os.path.join(DATA_DIR, "articles_meta.json")
+
+@st.cache_resource(show_spinner=False)
+def load_or_create_embeddings(_model):
+    if os.path.exists(EMBEDDINGS_FILE) and os.path.exists(ARTICLES_FILE):
+        with open(ARTICLES_FILE, 'r', encoding='utf-8') as f:
+            articles = json.load(f)
+        articles['file_ids'] = np.asarray(articles['file_ids'], dtype=np.int32)
+        # A raw .npy loads in one read with no unpickling; the cast below still copies it
+        embeddings = torch.from_numpy(np.load(EMBEDDINGS_FILE))
+        # Keep embeddings unit-length on the device so a query is a single matmul
+        embeddings = F.normalize(embeddings.to(device, torch.float32), dim=1)
+        return embeddings.to(compute_dtype), articles
 
-    articles_data = []
     text_files = get_all_text_files()
+    articles = to_columns(load_all_articles(get_data_signature(text_files)))
 
-    for file_path in text_files:
-        try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-                articles = content.split('//')
+    embeddings = create_embeddings(_model, articles['contents'])
+    if not articles['contents']:
+        # encode([]) gives a 1-D tensor that would poison the cache; index once data exists
+        return embeddings.to(compute_dtype), articles
 
-                for article in articles:
-                    if article.strip():
-                        articles_data.append({
-                            'file': os.path.basename(file_path),
-                            'content': article.strip()
-                        })
+    # Cache the embeddings in float16, which halves the file size
+    np.save(EMBEDDINGS_FILE, embeddings.cpu().to(torch.float16).numpy())
+    with open(ARTICLES_FILE, 'w', encoding='utf-8') as f:
+        json.dump({**articles, 'file_ids': articles['file_ids'].tolist()}, f, ensure_ascii=False)
 
-        except Exception as e:
-            st.error(f"Error reading {file_path}: {str(e)}")
-            continue
+    return embeddings.to(compute_dtype), articles
 
-    embeddings = create_embeddings(model, articles_data)
-
-    # Cache the embeddings
-    with open(cache_file, 'wb') as f:
-        pickle.dump({
-            'embeddings': embeddings,
-            'articles_data': articles_data
-        }, f)
-
-    return embeddings, articles_data
+def semantic_search(query, model, embeddings, articles, threshold=0.3, top_k=256, files=None):
+    if not query.strip() or len(articles['contents']) == 0:
+        return []
 
-def semantic_search(query, model, embeddings, articles_data, threshold=0.3):
-    query_embedding = model.encode(query, convert_to_tensor=True)
+    # Narrow to the selected files before scoring so filtered-out rows are never multiplied
+    candidates = None
+    if files:
+        file_ids = [i for i, name in enumerate(articles['files']) if name in files]
+        candidates = np.flatnonzero(np.isin(articles['file_ids'], file_ids))
+        if len(candidates) == 0:
+            return []
+        candidates = torch.from_numpy(candidates).to(device)
+
+    query_embedding = model.encode(
+        query,
+        convert_to_tensor=True,
+        normalize_embeddings=True,
+        device=device
+    )
 
-    # Calculate cosine similarity
-    similarities = cosine_similarity(
-        query_embedding.cpu().numpy().reshape(1, -1),
-        embeddings.cpu().numpy()
-    )[0]
+    # Embeddings are L2-normalized, so the dot product is the cosine similarity
+    matrix = embeddings if candidates is None else embeddings[candidates]
+    similarities = matrix @ query_embedding.to(embeddings.dtype)
 
-    # Get indices of articles above threshold, sorted by similarity
-    relevant_indices = np.where(similarities >= threshold)[0]
-    sorted_indices = relevant_indices[np.argsort(-similarities[relevant_indices])]
+    # Only the best top_k scores are sorted; topk returns them in descending order
+    scores, indices = torch.topk(similarities, k=min(top_k, similarities.shape[0]))
+    if candidates is not None:
+        indices = candidates[indices]
+    mask = scores >= threshold
 
     results = []
-    for idx in sorted_indices:
+    for idx, score in zip(indices[mask].tolist(), scores[mask].tolist()):
         results.append({
-            'file': articles_data[idx]['file'],
-            'content': articles_data[idx]['content'],
-            'similarity': similarities[idx]
+            'file': articles['files'][articles['file_ids'][idx]],
+            'content': articles['contents'][idx],
+            'similarity': score
         })
 
     return results
@@ -106,21 +126,25 @@ def display_results(results):
     if results:
         st.subheader(f"Found {len(results)} Relevant Articles:")
 
+        page = get_results_page(results)
+
         # Group results by file
         files_dict = {}
-        for result in results:
+        for result in page:
             if result['file'] not in files_dict:
                 files_dict[result['file']] = []
             files_dict[result['file']].append((result['content'], result['similarity']))
 
         # Display results grouped by file
         for file_name, articles in files_dict.items():
-            with st.expander(f"📄 {file_name} ({len(articles)} articles)"):
+            with st.expander(f"📄 {file_name} ({len(articles)} shown)"):
                 for idx, (article, similarity) in enumerate(articles, 1):
                     st.markdown(f"**Article {idx}** (Relevance: {similarity:.2%})")
                     st.write(article)
                     if idx < len(articles):
                         st.markdown("---")
+
+        show_results_pager(page, results)
     else:
         st.warning("No relevant articles found.")
 
@@ -131,7 +155,7 @@ def main():
     # Load the model and embeddings
     with st.spinner("Loading AI model..."):
         model = load_model()
-        embeddings, articles_data = load_or_create_embeddings(model)
+        embeddings, articles = load_or_create_embeddings(model)
 
     # Display available text files
     text_files = get_all_text_files()
@@ -160,6 +184,15 @@ def main():
         help="Adjust the minimum similarity score for matching articles"
     )
 
+    # Optionally restrict the search to some newspaper pages
+    selected_files = st.sidebar.multiselect(
+        "Limit to files",
+        articles['files'],
+        help="Leave empty to search all files"
+    )
+
+    gujarati_word = None
+    search_clicked = False
     if search_type == "English to Gujarati":
         search_word = st.text_input("Enter text to search (in English):")
 
@@ -169,11 +202,7 @@ def main():
 
             if gujarati_word:
                 st.success(f"Translated text: {gujarati_word}")
-
-                if st.button("Search", key="english_search"):
-                    with st.spinner("Performing semantic search..."):
-                        results = semantic_search(gujarati_word, model, embeddings, articles_data, threshold)
-                        display_results(results)
+                search_clicked = st.button("Search", key="english_search")
 
     else:  # Direct Gujarati Input
         st.markdown("""
@@ -184,12 +213,20 @@ def main():
         """)
 
         gujarati_word = st.text_input("Enter text in Gujarati:", key="gujarati_input")
-
         if gujarati_word:
-            if st.button("Search", key="gujarati_search"):
-                with st.spinner("Performing semantic search..."):
-                    results = semantic_search(gujarati_word, model, embeddings, articles_data, threshold)
-                    display_results(results)
+            search_clicked = st.button("Search", key="gujarati_search")
+
+    if gujarati_word:
+        # Stored results only apply to the same text, threshold and file selection
+        search_key = (gujarati_word, threshold, tuple(selected_files))
+        if search_clicked:
+            with st.spinner("Performing semantic search..."):
+                results = semantic_search(gujarati_word, model, embeddings, articles, threshold, files=selected_files)
+                store_results(search_key, results)
+
+        results = get_stored_results(search_key)
+        if results is not None:
+            display_results(results)
 
     # Add footer with instructions
     st.markdown("---")
@@ -230,4 +267,4 @@ if __name__ == "__main__":
     main()
 
 # Created/Modified files during execution:
-# - data/embeddings_cache.pkl (created when running for the first time or when content changes)
+# - data/embeddings.npy and data/articles_meta.json (created when running for the first time)
@@ -0,0 +1,107 @@
+import streamlit as st
+from deep_translator import GoogleTranslator
+import os
+import glob
+from concurrent.futures import ThreadPoolExecutor
+
+# Shared by app2.py and appV3.py.
+
+@st.cache_data(ttl=86400, max_entries=10000, show_spinner=False)
+def cached_translation(word):
+    # A fresh translator per call: translate() keeps the query on the instance, so a
+    # shared one could mix up concurrent sessions. Raised errors are not cached
+    return GoogleTranslator(source='en', target='gu').translate(word)
+
+def translate_to_gujarati(word):
+    try:
+        return cached_translation(word)
+    except Exception as e:
+        st.error(f"Translation error: {str(e)}")
+        return None
+
+DATA_DIR = "data"
+
+# Reads are I/O bound, so threads overlap the per-file open/read latency
+READ_WORKERS = 16
+
+@st.cache_data(max_entries=1, show_spinner=False)
+def list_text_files(dir_mtime):
+    return sorted(glob.glob(os.path.join(DATA_DIR, "*.txt")))
+
+def get_all_text_files():
+    try:
+        if not os.path.isdir(DATA_DIR):
+            return []
+        # The directory mtime changes whenever a file is added, removed or renamed
+        return list_text_files(os.stat(DATA_DIR).st_mtime_ns)
+    except Exception as e:
+        st.error(f"Error reading directory: {str(e)}")
+        return []
+
+def get_data_signature(text_files):
+    return tuple(sorted((os.path.basename(p), os.stat(p).st_mtime_ns) for p in text_files))
+
+def iter_articles(file_path):
+    # Stream the file so only the article being assembled is held in memory;
+    # a '//' separator can't span lines, so this matches content.split('//')
+    parts = []
+    with open(file_path, 'r', encoding='utf-8') as file:
+        for line in file:
+            pieces = line.split('//')
+            parts.append(pieces[0])
+            for piece in pieces[1:]:
+                yield ''.join(parts)
+                parts = [piece]
+    yield ''.join(parts)
+
+def read_articles(file_path):
+    return [article for article in map(str.strip, iter_articles(file_path)) if article]
+
+@st.cache_data(max_entries=1, show_spinner=False)
+def load_all_articles(signature):
+    # signature is only used as the cache key, so files are re-read only when they change
+    file_names = [file_name for file_name, _ in signature]
+
+    with ThreadPoolExecutor(max_workers=READ_WORKERS) as executor:
+        futures = [executor.submit(read_articles, os.path.join(DATA_DIR, name)) for name in file_names]
+
+    articles_data = []
+    for file_name, future in zip(file_names, futures):
+        try:
+            articles = future.result()
+        except Exception as e:
+            st.error(f"Error reading {os.path.join(DATA_DIR, file_name)}: {str(e)}")
+            continue
+
+        for article in articles:
+            articles_data.append({
+                'file': file_name,
+                'content': article
+            })
+
+    return articles_data
+
+RESULTS_PAGE_SIZE = 50
+
+def store_results(search_key, results):
+    # Results outlive the Search click so "Load more" can page without searching again
+    st.session_state['search_results'] = (search_key, results)
+    st.session_state['results_shown'] = RESULTS_PAGE_SIZE
+
+def get_stored_results(search_key):
+    stored = st.session_state.get('search_results')
+    if stored is None or stored[0] != search_key:
+        return None
+    return stored[1]
+
+def get_results_page(results):
+    # Render one page at a time; a large hit list floods the page with elements
+    return results[:st.session_state.get('results_shown', RESULTS_PAGE_SIZE)]
+
+def show_more_results():
+    st.session_state['results_shown'] = st.session_state.get('results_shown', RESULTS_PAGE_SIZE) + RESULTS_PAGE_SIZE
+
+def show_results_pager(page, results):
+    if len(page) < len(results):
+        st.caption(f"Showing {len(page)} of {len(results)} articles")
+        st.button("Load more", on_click=show_more_results)
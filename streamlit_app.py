@@ -1,27 +1,45 @@
 import streamlit as st
-import os
 from pathlib import Path
 import logging
+import json
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
 from llama_index.core import (
     VectorStoreIndex,
     Document,
-    Settings
+    Settings,
+    StorageContext,
+    load_index_from_storage
 )
-from llama_index.embeddings.openai import OpenAIEmbedding
-from llama_index.llms.openai import OpenAI
-from llama_index.core.node_parser import SimpleNodeParser
+from llama_index.core.retrievers import VectorIndexRetriever
+from llama_index.core.vector_stores import MetadataFilter, MetadataFilters, FilterOperator
+from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+from llama_index.core.node_parser import SentenceSplitter
+
+# Multilingual model that handles both English and Gujarati, run locally
+EMBED_MODEL_NAME = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+# Bump when the way documents are built changes, so persisted indexes are rebuilt
+INDEX_VERSION = "3"
+
+DATA_DIR = Path(__file__).parent / "data"
+PERSIST_DIR = DATA_DIR / ".index"
+MANIFEST_FILE = PERSIST_DIR / "manifest.json"
+
+# Threads overlap the per-file open/read latency when indexing many text files
+READ_WORKERS = 16
 
 
 class NewspaperFinderBot:
     def __init__(self):
-        # Initialize OpenAI
-        self.llm = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
-        self.embed_model = OpenAIEmbedding(api_key=st.secrets["OPENAI_API_KEY"])
+        # Initialize local embeddings
+        self.embed_model = NewspaperFinderBot.load_embed_model()
 
-        # Configure settings
-        Settings.llm = self.llm
+        # Configure settings. Search only returns source nodes, so no LLM is needed;
+        # None makes LlamaIndex use its offline MockLLM rather than a paid completion model
+        Settings.llm = None
         Settings.embed_model = self.embed_model
-        Settings.chunk_size = 512
 
         self.setup_logging()
 
@@ -31,38 +49,106 @@ class NewspaperFinderBot:
             format='%(asctime)s - %(levelname)s - %(message)s'
         )
 
+    @staticmethod
+    @st.cache_resource
+    def load_embed_model():
+        """Load the embedding model once per process."""
+        # Encode in batches of 64 like appV3 rather than the default of 10
+        return HuggingFaceEmbedding(model_name=EMBED_MODEL_NAME, embed_batch_size=64)
+
+    @staticmethod
+    def get_file_stats(data_dir: Path) -> dict:
+        """Map every text file in the data directory to its [mtime, size]."""
+        stats = {}
+        for file_path in data_dir.glob('*.txt'):  # Process only .txt files
+            stat = file_path.stat()
+            stats[file_path.name] = [stat.st_mtime_ns, stat.st_size]
+        return stats
+
+    @staticmethod
+    def read_documents(data_dir: Path, filename: str) -> list:
+        """Create one Document per '//'-separated article in a text file."""
+        with open(data_dir / filename, 'r', encoding='utf-8') as file:
+            content = file.read()
+
+        documents = []
+        # Index each article on its own so no chunk mixes articles
+        for article in content.split('//'):
+            doc_text = article.strip()
+            if not doc_text:
+                continue
+
+            metadata = {
+                'source': filename  # Use the filename as the source
+            }
+            # Stable ids let a changed file's articles be deleted from a persisted index;
+            # the source is only for display, so keep it out of the embedded text
+            documents.append(Document(
+                id_=f"{filename}#{len(documents)}",
+                text=doc_text,
+                metadata=metadata,
+                excluded_embed_metadata_keys=['source'],
+                excluded_llm_metadata_keys=['source']
+            ))
+        return documents
+
     @staticmethod
     @st.cache_resource
     def load_and_index_articles():
-        """Load text files and create a searchable index."""
+        """Load the persisted index and re-embed only the text files that changed."""
         try:
-            # Get the current directory
-            current_dir = Path(__file__).parent
-            data_dir = current_dir / "data"
-
-            documents = []
-            total_articles = 0
-
-            for filename in os.listdir(data_dir):
-                if filename.endswith('.txt'):  # Process only .txt files
-                    file_path = data_dir / filename
-                    with open(file_path, 'r', encoding='utf-8') as file:
-                        content = file.read().strip()  # Read and strip whitespace
-                        total_articles += 1
-
-                        # Create a structured document for each text file
-                        doc_text = content
-                        metadata = {
-                            'source': filename  # Use the filename as the source
-                        }
-                        documents.append(Document(text=doc_text, metadata=metadata))
-
-            # Create index from documents
-            parser = SimpleNodeParser.from_defaults()
-            nodes = parser.get_nodes_from_documents(documents)
-            index = VectorStoreIndex(nodes)
-
-            logging.info(f"Successfully indexed {total_articles} articles")
+            # A persisted index is only valid for the settings that produced its vectors
+            settings = {'embed_model': EMBED_MODEL_NAME, 'version': INDEX_VERSION}
+            manifest = None
+            if (PERSIST_DIR / "docstore.json").exists() and MANIFEST_FILE.exists():
+                with open(MANIFEST_FILE, 'r', encoding='utf-8') as file:
+                    manifest = json.load(file)
+
+            if manifest and manifest.get('settings') == settings:
+                storage_context = StorageContext.from_defaults(persist_dir=str(PERSIST_DIR))
+                index = load_index_from_storage(storage_context)
+                indexed_files = manifest['files']
+            else:
+                index = VectorStoreIndex([])
+                indexed_files = {}
+
+            current_files = NewspaperFinderBot.get_file_stats(DATA_DIR)
+
+            # Drop the articles of files that were removed or modified since the last run
+            stale_files = [
+                filename for filename, entry in indexed_files.items()
+                if current_files.get(filename) != entry['stat']
+            ]
+            for filename in stale_files:
+                for doc_id in indexed_files.pop(filename)['doc_ids']:
+                    index.delete_ref_doc(doc_id, delete_from_docstore=True)
+
+            # Embed only new and modified files; articles that fit in one chunk stay whole
+            new_files = [filename for filename in current_files if filename not in indexed_files]
+            if new_files:
+                with ThreadPoolExecutor(max_workers=READ_WORKERS) as executor:
+                    file_documents = list(executor.map(
+                        NewspaperFinderBot.read_documents, [DATA_DIR] * len(new_files), new_files
+                    ))
+
+                parser = SentenceSplitter(chunk_size=512, chunk_overlap=0)
+                for filename, documents in zip(new_files, file_documents):
+                    index.insert_nodes(parser.get_nodes_from_documents(documents))
+                    indexed_files[filename] = {
+                        'stat': current_files[filename],
+                        'doc_ids': [document.doc_id for document in documents]
+                    }
+
+            if stale_files or new_files or manifest is None:
+                index.storage_context.persist(persist_dir=str(PERSIST_DIR))
+                with open(MANIFEST_FILE, 'w', encoding='utf-8') as file:
+                    json.dump({'settings': settings, 'files': indexed_files}, file)
+
+            total_articles = sum(len(entry['doc_ids']) for entry in indexed_files.values())
+            logging.info(
+                f"Indexed {total_articles} articles "
+                f"({len(new_files)} files embedded, {len(stale_files)} files removed or replaced)"
+            )
             return index, total_articles
 
         except Exception as e:
@@ -70,21 +156,23 @@ class NewspaperFinderBot:
             st.error(f"Error loading and indexing files: {str(e)}")
             return None, 0
 
-    def search_news(self, query: str, index, max_results: int = 5):
-        """Search news articles using LlamaIndex."""
+    def search_news(self, query: str, index, max_results: int = 5, sources=()):
+        """Search news articles using LlamaIndex, optionally limited to some source files."""
         try:
-            # Create query engine
-            query_engine = index.as_query_engine(
-                similarity_top_k=max_results,
-                response_mode="no_text"
-            )
+            # The vector store drops nodes from other sources before computing similarities
+            filters = None
+            if sources:
+                filters = MetadataFilters(filters=[
+                    MetadataFilter(key='source', value=list(sources), operator=FilterOperator.IN)
+                ])
 
-            # Execute search
-            response = query_engine.query(query)
+            # Retrieve nodes directly; no query engine or response synthesis is needed
+            retriever = VectorIndexRetriever(index=index, similarity_top_k=max_results, filters=filters)
+            retrieved_nodes = retriever.retrieve(query)
 
             # Process results
             results = []
-            for node in response.source_nodes:
+            for node in retrieved_nodes:
                 # Extract article information from node
                 article = {
                     'content': node.text,  # Full content of the article
@@ -100,29 +188,82 @@ class NewspaperFinderBot:
             st.error(f"Error searching news: {str(e)}")
             return []
 
+    @staticmethod
+    def get_index_stamp():
+        """Identify the persisted index by its manifest, which is rewritten on every change."""
+        try:
+            stat = MANIFEST_FILE.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    @st.cache_resource
+    def build_keyword_index(_index, index_stamp):
+        """Fit a character n-gram TF-IDF matrix over the indexed nodes."""
+        nodes = list(_index.docstore.docs.values())
+        if not nodes:
+            return None
 
-def main():
-    st.set_page_config(
-        page_title="Gujarati News Finder",
-        page_icon="📰",
-        layout="wide"
-    )
+        # char_wb n-grams match Gujarati word stems without a language-specific tokenizer
+        vectorizer = TfidfVectorizer(analyzer='char_wb', ngram_range=(3, 5))
+        matrix = vectorizer.fit_transform([node.get_content() for node in nodes])
+        node_sources = np.array([node.metadata.get('source', '') for node in nodes])
+        return vectorizer, matrix, nodes, node_sources
 
-    st.title("📰 Gujarati News Finder")
-    st.write("Search through Gujarati newspaper articles using natural language queries.")
+    def keyword_search(self, query: str, index, max_results: int = 5, sources=()):
+        """Search news articles by TF-IDF similarity of character n-grams."""
+        try:
+            keyword_index = NewspaperFinderBot.build_keyword_index(
+                index, NewspaperFinderBot.get_index_stamp()
+            )
+            if keyword_index is None:
+                return []
+            vectorizer, matrix, nodes, node_sources = keyword_index
 
-    # Initialize the bot
-    bot = NewspaperFinderBot()
+            # Keep only rows from the selected sources so the others are never scored
+            rows = np.arange(len(nodes))
+            if sources:
+                rows = np.flatnonzero(np.isin(node_sources, list(sources)))
+                matrix = matrix[rows]
 
-    # Load and index news data
-    with st.spinner("Loading and indexing articles..."):
-        index, total_articles = NewspaperFinderBot.load_and_index_articles()
-        if index:
-            st.success(f"Loaded and indexed {total_articles} articles successfully!")
-        else:
-            st.error("Failed to load articles.")
-            return
+            # Rows are L2-normalized, so one sparse matrix-vector product gives cosine scores
+            scores = (matrix @ vectorizer.transform([query]).T).toarray().ravel()
+            k = min(max_results, len(scores))
+            if k == 0:
+                return []
+
+            # Select the top k without sorting the whole corpus, then order just those
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+
+            results = []
+            for i in top:
+                if scores[i] > 0:
+                    node = nodes[rows[i]]
+                    results.append({
+                        'content': node.get_content(),
+                        'source': node.metadata.get('source', 'Unknown Source')
+                    })
 
+            logging.info(f"Found {len(results)} keyword matches for query: {query}")
+            return results
+
+        except Exception as e:
+            logging.error(f"Error searching news: {str(e)}")
+            st.error(f"Error searching news: {str(e)}")
+            return []
+
+
+@st.cache_resource
+def get_bot():
+    """Create one NewspaperFinderBot shared by every session and rerun."""
+    return NewspaperFinderBot()
+
+
+@st.fragment
+def search_fragment(bot, index, search_type: str, sources: list):
+    """Render the search form and results; interacting with it reruns only this fragment."""
     # Search interface
     col1, col2 = st.columns([3, 1])
     with col1:
@@ -138,18 +279,13 @@ def main():
             value=5
         )
 
-    # Add filters in the sidebar
-    st.sidebar.title("Search Options")
-    search_type = st.sidebar.radio(
-        "Search Type",
-        ["Semantic Search", "Keyword Match"],
-        help="Semantic search understands context, keyword match looks for exact terms"
-    )
-
     if st.button("Search", type="primary"):
         if query:
             with st.spinner("Searching..."):
-                results = bot.search_news(query, index, max_results)
+                if search_type == "Keyword Match":
+                    results = bot.keyword_search(query, index, max_results, sources)
+                else:
+                    results = bot.search_news(query, index, max_results, sources)
 
             if results:
                 st.write(f"Found {len(results)} relevant articles:")
@@ -163,6 +299,44 @@ def main():
         else:
             st.warning("Please enter a search query.")
 
+
+def main():
+    st.set_page_config(
+        page_title="Gujarati News Finder",
+        page_icon="📰",
+        layout="wide"
+    )
+
+    st.title("📰 Gujarati News Finder")
+    st.write("Search through Gujarati newspaper articles using natural language queries.")
+
+    # Initialize the bot
+    bot = get_bot()
+
+    # Load and index news data
+    with st.spinner("Loading and indexing articles..."):
+        index, total_articles = NewspaperFinderBot.load_and_index_articles()
+        if index:
+            st.success(f"Loaded and indexed {total_articles} articles successfully!")
+        else:
+            st.error("Failed to load articles.")
+            return
+
+    # Add filters in the sidebar
+    st.sidebar.title("Search Options")
+    search_type = st.sidebar.radio(
+        "Search Type",
+        ["Semantic Search", "Keyword Match"],
+        help="Semantic search understands context, keyword match looks for exact terms"
+    )
+    sources = st.sidebar.multiselect(
+        "Limit to files",
+        sorted(NewspaperFinderBot.get_file_stats(DATA_DIR)),
+        help="Leave empty to search all files"
+    )
+
+    search_fragment(bot, index, search_type, sources)
+
     # Add information in the sidebar
     st.sidebar.title("About")
     st.sidebar.info("""